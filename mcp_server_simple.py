@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
-"""Amsterdam Municipal Data MCP Server - 4 Working APIs"""
-import json, sys, logging
+"""Amsterdam Municipal Data MCP Server - 7 Working APIs"""
+import argparse, functools, json, os, sys, logging
 from typing import Any, Dict
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
@@ -10,39 +10,95 @@ from server.tools.search_bag_address import search_bag_address
 from server.tools.get_gebieden import get_gebieden
 from server.tools.get_waste_containers import get_waste_containers
 from server.tools.get_vehicle_data import get_vehicle_data
+from server.tools.get_infrastructure import get_infrastructure
+from server.tools.export_dataset import export_dataset
+from server.tools.get_gebied_hierarchy import get_gebied_hierarchy
 
-def main():
-    logger.info("Amsterdam Municipal MCP Server - 4 tools active")
+# First entry is the default offered when the client asks for an unsupported version.
+# 2024-11-05 has no Streamable HTTP, so the HTTP transport only speaks 2025-03-26.
+STDIO_PROTOCOL_VERSIONS = ("2024-11-05", "2025-03-26")
+HTTP_PROTOCOL_VERSIONS = ("2025-03-26",)
+
+PAGING = {"cursor":{"type":"string","description":"next_cursor from a previous call"},"max_pages":{"type":["integer","null"],"description":"Pages to fetch; null fetches all"}}
+
+def write_stdout(msg):
+    print(json.dumps(msg), flush=True)
+
+def progress_notifier(token, send):
+    """Return an on_progress callback sending notifications/progress for token, or None"""
+    if token is None: return None
+    def notify(pages, total, items):
+        params = {"progressToken":token,"progress":pages,"message":f"{items} items fetched"}
+        if total: params["total"] = total
+        send({"jsonrpc":"2.0","method":"notifications/progress","params":params})
+    return notify
+
+def handle_request(req, send=write_stdout, protocol_versions=STDIO_PROTOCOL_VERSIONS):
+    """Handle one JSON-RPC message; notifications go through send, the response is returned (None for notifications)"""
+    try:
+        method = req.get("method")
+        
+        if method == "initialize":
+            requested = (req.get("params") or {}).get("protocolVersion")
+            version = requested if requested in protocol_versions else protocol_versions[0]
+            res = {"jsonrpc":"2.0","id":req.get("id"),"result":{"protocolVersion":version,"capabilities":{"tools":{}},"serverInfo":{"name":"amsterdam-municipal","version":"1.0.0"}}}
+        elif method == "tools/list":
+            res = {"jsonrpc":"2.0","id":req.get("id"),"result":{"tools":[
+                {"name":"search_bag_address","description":"Search Amsterdam addresses","inputSchema":{"type":"object","properties":{"query":{"type":"string"},"limit":{"type":"integer"}},"required":["query"]}},
+                {"name":"get_gebieden","description":"Get Amsterdam neighborhoods (99 areas)","inputSchema":{"type":"object","properties":{"gebied_type":{"type":"string"},"naam":{"type":"string"},**PAGING},"required":["gebied_type"]}},
+                {"name":"get_waste_containers","description":"Find waste containers","inputSchema":{"type":"object","properties":{"lat":{"type":"number"},"lon":{"type":"number"},"radius":{"type":"integer"},"container_type":{"type":"string"},**PAGING}}},
+                {"name":"get_vehicle_data","description":"Dutch vehicle registration data","inputSchema":{"type":"object","properties":{"kenteken":{"type":"string"},"postcode":{"type":"string"},"merk":{"type":"string"}}}},
+                {"name":"get_infrastructure","description":"Public space objects (verhardingen, groenobjecten, terreindeel)","inputSchema":{"type":"object","properties":{"object_type":{"type":"string"},"stadsdeel":{"type":"string"},"limit":{"type":["integer","null"],"description":"Maximum results; null for no cap. No next_cursor is returned when it ends mid-page"},"page_size":{"type":"integer","description":"Objects per upstream page (default: limit)"},**PAGING}}},
+                {"name":"export_dataset","description":"Export a full objectenopenbareruimte dataset to local NDJSON/Parquet files; returns a manifest","inputSchema":{"type":"object","properties":{"object_type":{"type":"string"},"output_dir":{"type":"string","description":"Subdirectory of the server export root"},"partition_by":{"type":"string","enum":["stadsdeel","pages"]},"stadsdelen":{"type":"array","items":{"type":"string"}},"file_format":{"type":"string","enum":["ndjson","parquet"]},"page_size":{"type":"integer","minimum":1,"maximum":1000},"workers":{"type":"integer","minimum":1,"maximum":16},"resume":{"type":"boolean"}}}},
+                {"name":"get_gebied_hierarchy","description":"Look up Amsterdam areas by code or (fuzzy) name and navigate stadsdeel/wijk/buurt/bouwblok parents and children","inputSchema":{"type":"object","properties":{"query":{"type":"string"},"gebied_type":{"type":"string","enum":["stadsdeel","wijk","buurt","bouwblok"]},"relation":{"type":"string","enum":["self","children","ancestors","descendants"]},"target_type":{"type":"string"},"limit":{"type":"integer"}},"required":["query"]}}
+            ]}}
+        elif method == "tools/call":
+            tool = req["params"]["name"]
+            args = req["params"].get("arguments",{})
+            paging = {"cursor":args.get("cursor"),"max_pages":args.get("max_pages",1),"on_progress":progress_notifier(req["params"].get("_meta",{}).get("progressToken"), send)}
+            if tool == "search_bag_address": data = search_bag_address(args["query"], args.get("limit",20))
+            elif tool == "get_gebieden": data = get_gebieden(args["gebied_type"], args.get("naam"), **paging)
+            elif tool == "get_waste_containers": data = get_waste_containers(args.get("lat"), args.get("lon"), args.get("radius",500), args.get("container_type"), **paging)
+            elif tool == "get_vehicle_data": data = get_vehicle_data(args.get("kenteken"), args.get("postcode"), args.get("merk"))
+            elif tool == "get_infrastructure": data = get_infrastructure(args.get("object_type","verhardingen"), args.get("stadsdeel"), args.get("limit",20), args.get("page_size"), **paging)
+            elif tool == "export_dataset": data = export_dataset(args.get("object_type","verhardingen"), args.get("output_dir","."), args.get("partition_by","stadsdeel"), args.get("stadsdelen"), args.get("file_format","ndjson"), args.get("page_size",1000), args.get("workers",4), args.get("resume",True), paging["on_progress"])
+            elif tool == "get_gebied_hierarchy": data = get_gebied_hierarchy(args["query"], args.get("gebied_type"), args.get("relation","self"), args.get("target_type"), args.get("limit",20))
+            else: raise ValueError(f"Unknown tool: {tool}")
+            res = {"jsonrpc":"2.0","id":req.get("id"),"result":{"content":[{"type":"text","text":json.dumps(data,indent=2,ensure_ascii=False)}]}}
+        else: res = None
+        return res
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        return {"jsonrpc":"2.0","id":req.get("id",0),"error":{"code":-32603,"message":str(e)}}
+
+def serve_stdio():
     while True:
         line = sys.stdin.readline()
         if not line: break
-        try:
-            req = json.loads(line.strip())
-            method = req.get("method")
-            
-            if method == "initialize":
-                res = {"jsonrpc":"2.0","id":req.get("id"),"result":{"protocolVersion":"2024-11-05","capabilities":{"tools":{}},"serverInfo":{"name":"amsterdam-municipal","version":"1.0.0"}}}
-            elif method == "tools/list":
-                res = {"jsonrpc":"2.0","id":req.get("id"),"result":{"tools":[
-                    {"name":"search_bag_address","description":"Search Amsterdam addresses","inputSchema":{"type":"object","properties":{"query":{"type":"string"},"limit":{"type":"integer"}},"required":["query"]}},
-                    {"name":"get_gebieden","description":"Get Amsterdam neighborhoods (99 areas)","inputSchema":{"type":"object","properties":{"gebied_type":{"type":"string"},"naam":{"type":"string"}},"required":["gebied_type"]}},
-                    {"name":"get_waste_containers","description":"Find waste containers","inputSchema":{"type":"object","properties":{"lat":{"type":"number"},"lon":{"type":"number"},"radius":{"type":"integer"},"container_type":{"type":"string"}}}},
-                    {"name":"get_vehicle_data","description":"Dutch vehicle registration data","inputSchema":{"type":"object","properties":{"kenteken":{"type":"string"},"postcode":{"type":"string"},"merk":{"type":"string"}}}}
-                ]}}
-            elif method == "tools/call":
-                tool = req["params"]["name"]
-                args = req["params"].get("arguments",{})
-                if tool == "search_bag_address": data = search_bag_address(args["query"], args.get("limit",20))
-                elif tool == "get_gebieden": data = get_gebieden(args["gebied_type"], args.get("naam"))
-                elif tool == "get_waste_containers": data = get_waste_containers(args.get("lat"), args.get("lon"), args.get("radius",500), args.get("container_type"))
-                elif tool == "get_vehicle_data": data = get_vehicle_data(args.get("kenteken"), args.get("postcode"), args.get("merk"))
-                else: raise ValueError(f"Unknown tool: {tool}")
-                res = {"jsonrpc":"2.0","id":req.get("id"),"result":{"content":[{"type":"text","text":json.dumps(data,indent=2,ensure_ascii=False)}]}}
-            else: res = None
-            
-            if res: print(json.dumps(res), flush=True)
-        except Exception as e:
-            logger.error(f"Error: {e}")
-            print(json.dumps({"jsonrpc":"2.0","id":req.get("id",0),"error":{"code":-32603,"message":str(e)}}), flush=True)
+        try: req = json.loads(line.strip())
+        except ValueError as e:
+            write_stdout({"jsonrpc":"2.0","id":None,"error":{"code":-32700,"message":f"Parse error: {e}"}})
+            continue
+        res = handle_request(req)
+        if res: write_stdout(res)
+
+def main():
+    parser = argparse.ArgumentParser(description="Amsterdam Municipal Data MCP Server")
+    parser.add_argument("--transport", choices=["stdio","http"], default="stdio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=8, help="Tool calls executed concurrently across all sessions")
+    parser.add_argument("--max-sessions", type=int, default=64)
+    parser.add_argument("--max-inflight", type=int, default=4, help="Concurrent requests per session before 429")
+    parser.add_argument("--idle-timeout", type=float, default=3600.0, help="Seconds before an idle session is dropped")
+    parser.add_argument("--auth-token", default=os.getenv("MCP_AUTH_TOKEN"), help="Bearer token required by the HTTP transport (default: $MCP_AUTH_TOKEN); mandatory off loopback")
+    parser.add_argument("--allowed-origin", action="append", default=[], help="Extra browser Origin allowed to call the HTTP transport (repeatable)")
+    opts = parser.parse_args()
+    logger.info(f"Amsterdam Municipal MCP Server - 7 tools active ({opts.transport})")
+    if opts.transport == "http":
+        from server.http_transport import is_loopback, serve_http
+        if not opts.auth_token and not is_loopback(opts.host): parser.error(f"--auth-token is required to serve on {opts.host}")
+        serve_http(functools.partial(handle_request, protocol_versions=HTTP_PROTOCOL_VERSIONS), opts.host, opts.port, workers=opts.workers, max_sessions=opts.max_sessions, max_inflight=opts.max_inflight, idle_timeout=opts.idle_timeout, allowed_origins=opts.allowed_origin, auth_token=opts.auth_token)
+    else: serve_stdio()
 
 if __name__ == "__main__": main()
@@ -0,0 +1,338 @@
+"""In-memory stadsdeel -> wijk -> buurt -> bouwblok hierarchy
+
+Built from the gebieden endpoints on first use and refreshed after a TTL.
+Each level is loaded lazily, so validating a stadsdeel filter never pulls
+in the bouwblokken. Lookups by identificatie, code and vollcode are dict
+hits; names support exact, prefix and fuzzy (difflib) matching.
+
+Levels are fetched outside the index lock and swapped in when complete, so
+readers keep using the previous generation while a refresh runs. After a
+failed load the level is not fetched again for `retry_after` seconds; a
+stale level keeps being served, a missing one raises ConnectionError.
+"""
+import bisect
+import difflib
+import logging
+import os
+import threading
+import time
+import unicodedata
+import requests
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from server.paging import stream_pages
+
+logger = logging.getLogger("amsterdam-mcp")
+
+BASE_URL = "https://api.data.amsterdam.nl/v1/gebieden/"
+
+LEVELS = ("stadsdeel", "wijk", "buurt", "bouwblok")
+
+ENDPOINTS = {
+    "stadsdeel": "stadsdelen",
+    "wijk": "wijken",
+    "buurt": "buurten",
+    "bouwblok": "bouwblokken"
+}
+
+# Relation from each level to its parent level
+PARENT_RELATION = {
+    "wijk": "ligtInStadsdeel",
+    "buurt": "ligtInWijk",
+    "bouwblok": "ligtInBuurt"
+}
+
+
+def normalize(name: str) -> str:
+    """Lowercase and strip accents and surrounding whitespace for name matching"""
+    decomposed = unicodedata.normalize("NFKD", name)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+def similarity(query: str, name: str) -> float:
+    """Best difflib ratio of query against the whole name or any of its words"""
+    words = name.replace("-", " ").split()
+    return max(difflib.SequenceMatcher(None, query, part).ratio() for part in [name, *words])
+
+
+def _parent_id(item: Dict[str, Any], relation: str) -> Optional[str]:
+    """Read a parent reference as either `<relation>Id` or a HAL link"""
+    if item.get(f"{relation}Id"):
+        return item[f"{relation}Id"]
+    link = item.get("_links", {}).get(relation)
+    if isinstance(link, dict):
+        return link.get("identificatie")
+    if isinstance(item.get(relation), dict):
+        return item[relation].get("identificatie")
+    return None
+
+
+class Gebied:
+    """One area in the hierarchy"""
+    __slots__ = ("identificatie", "code", "vollcode", "naam", "level", "parent_id", "child_ids")
+
+    def __init__(self, identificatie: str, code: Optional[str], vollcode: Optional[str],
+                 naam: Optional[str], level: str, parent_id: Optional[str]):
+        self.identificatie = identificatie
+        self.code = code
+        self.vollcode = vollcode
+        self.naam = naam
+        self.level = level
+        self.parent_id = parent_id
+        self.child_ids: List[str] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.identificatie,
+            "code": self.code,
+            "vollcode": self.vollcode,
+            "naam": self.naam,
+            "type": self.level,
+            "parent_id": self.parent_id,
+            "children": len(self.child_ids)
+        }
+
+
+class GebiedenIndex:
+    """Thread-safe, lazily loaded gebieden hierarchy"""
+
+    def __init__(self, ttl: float = 86400, retry_after: float = 60):
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._loaded_at: Dict[str, float] = {}
+        # level -> Event set when the fetch in progress finishes
+        self._loading: Dict[str, threading.Event] = {}
+        # level -> (monotonic time until which no fetch is tried, error)
+        self._failed: Dict[str, Tuple[float, Exception]] = {}
+        self._by_id: Dict[str, Gebied] = {}
+        # (level, upper-cased code or vollcode) -> Gebied
+        self._by_code: Dict[Tuple[str, str], Gebied] = {}
+        # level -> sorted [(normalized naam, identificatie)]
+        self._names: Dict[str, List[Tuple[str, str]]] = {}
+
+    def _fetch_level(self, level: str) -> List[Gebied]:
+        api_key = os.getenv("AMSTERDAM_API_KEY")
+        headers = {"X-Api-Key": api_key} if api_key else {}
+        endpoint = ENDPOINTS[level]
+        relation = PARENT_RELATION.get(level)
+        nodes = []
+        for page in stream_pages(f"{BASE_URL}{endpoint}/", endpoint, {"_pageSize": 1000},
+                                 headers, max_pages=None):
+            # Geometry is decoded per item and dropped right away
+            for item in page.items():
+                if not item.get("identificatie"):
+                    continue
+                nodes.append(Gebied(
+                    item["identificatie"],
+                    item.get("code"),
+                    item.get("vollcode"),
+                    item.get("naam"),
+                    level,
+                    _parent_id(item, relation) if relation else None
+                ))
+        return nodes
+
+    def _install(self, level: str, nodes: List[Gebied]) -> None:
+        # Called with the lock held. Build new tables and swap them in, so
+        # concurrent readers never see a half-updated dict; the previous
+        # generation of this level is dropped
+        by_id = {k: v for k, v in self._by_id.items() if v.level != level}
+        by_code = {k: v for k, v in self._by_code.items() if k[0] != level}
+        for node in nodes:
+            by_id[node.identificatie] = node
+            for code in (node.code, node.vollcode):
+                if code:
+                    by_code[(level, code.upper())] = node
+
+        children: Dict[str, List[str]] = {}
+        for node in by_id.values():
+            if node.parent_id in by_id:
+                children.setdefault(node.parent_id, []).append(node.identificatie)
+        for ident, node in by_id.items():
+            node.child_ids = children.get(ident, [])
+
+        self._by_id, self._by_code = by_id, by_code
+        self._names[level] = sorted((normalize(n.naam), n.identificatie) for n in nodes if n.naam)
+        self._loaded_at[level] = time.monotonic()
+        logger.info(f"Gebieden index: loaded {len(nodes)} {ENDPOINTS[level]}")
+
+    def ensure(self, *levels: str) -> None:
+        """Load or refresh the given levels (default: all but bouwblok)"""
+        levels = levels or LEVELS[:3]
+        for level in LEVELS:
+            if level in levels:
+                self._ensure_level(level)
+
+    def _ensure_level(self, level: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            loaded_at = self._loaded_at.get(level)
+            if loaded_at is not None and now - loaded_at < self.ttl:
+                return
+            failed = self._failed.get(level)
+            if failed and now < failed[0]:
+                if loaded_at is not None:
+                    return
+                raise requests.exceptions.ConnectionError(
+                    f"Gebieden {ENDPOINTS[level]} unavailable, retrying in {failed[0] - now:.0f}s: {failed[1]}")
+            loading = self._loading.get(level)
+            if loading is None:
+                loading = self._loading[level] = threading.Event()
+                fetch = True
+            else:
+                fetch = False
+                if loaded_at is not None:
+                    # Another thread is refreshing; keep serving the old level
+                    return
+
+        if not fetch:
+            loading.wait()
+            with self._lock:
+                if level not in self._loaded_at:
+                    raise requests.exceptions.ConnectionError(
+                        f"Gebieden {ENDPOINTS[level]} unavailable: {self._failed[level][1]}")
+            return
+
+        try:
+            nodes = self._fetch_level(level)
+        except Exception as e:
+            with self._lock:
+                self._failed[level] = (time.monotonic() + self.retry_after, e)
+                del self._loading[level]
+            loading.set()
+            if loaded_at is None:
+                raise
+            logger.warning(f"Gebieden index: refresh of {ENDPOINTS[level]} failed, serving previous data: {e}")
+            return
+        with self._lock:
+            self._install(level, nodes)
+            self._failed.pop(level, None)
+            del self._loading[level]
+        loading.set()
+
+    def get(self, key: str, level: Optional[str] = None) -> Optional[Gebied]:
+        """Look up by identificatie, code or vollcode (bouwblokken only with level="bouwblok")"""
+        levels = [level] if level else LEVELS[:3]
+        self.ensure(*levels)
+        key = key.strip()
+        node = self._by_id.get(key)
+        if node and node.level in levels:
+            return node
+        for lvl in levels:
+            node = self._by_code.get((lvl, key.upper()))
+            if node:
+                return node
+        return None
+
+    def search(self, naam: str, level: Optional[str] = None, limit: int = 10,
+               fuzzy: bool = True) -> List[Gebied]:
+        """Exact, then prefix, then fuzzy name matches"""
+        levels = [level] if level else LEVELS[:3]
+        self.ensure(*levels)
+        query = normalize(naam)
+        exact, prefix, candidates = [], [], {}
+        for lvl in levels:
+            names = self._names.get(lvl, [])
+            i = bisect.bisect_left(names, (query, ""))
+            while i < len(names) and names[i][0].startswith(query):
+                node = self._by_id[names[i][1]]
+                (exact if names[i][0] == query else prefix).append(node)
+                i += 1
+            if fuzzy:
+                for name, ident in names:
+                    candidates.setdefault(name, []).append(ident)
+
+        matches = exact + prefix
+        if fuzzy and len(matches) < limit:
+            seen = {n.identificatie for n in matches}
+            scored = sorted(((similarity(query, name), name) for name in candidates), reverse=True)
+            for score, name in scored[:limit]:
+                if score < 0.6:
+                    break
+                matches.extend(self._by_id[i] for i in candidates[name] if i not in seen)
+        return matches[:limit]
+
+    def resolve(self, value: str, level: str) -> Optional[Gebied]:
+        """Resolve a code, vollcode, identificatie or exact name at one level"""
+        node = self.get(value, level)
+        if node:
+            return node
+        exact = [n for n in self.search(value, level, fuzzy=False) if normalize(n.naam) == normalize(value)]
+        return exact[0] if exact else None
+
+    def at_level(self, level: str) -> List[Gebied]:
+        """All areas at one level, by name"""
+        self.ensure(level)
+        return [self._by_id[i] for _, i in self._names.get(level, [])]
+
+    def children(self, node: Gebied) -> List[Gebied]:
+        depth = LEVELS.index(node.level)
+        if depth + 1 < len(LEVELS):
+            self.ensure(LEVELS[depth + 1])
+        return [self._by_id[i] for i in node.child_ids if i in self._by_id]
+
+    def descendants(self, node: Gebied, level: str) -> List[Gebied]:
+        """All areas at `level` below node"""
+        target = LEVELS.index(level)
+        frontier = [node]
+        while frontier and LEVELS.index(frontier[0].level) < target:
+            frontier = [c for n in frontier for c in self.children(n)]
+        return frontier if frontier and frontier[0].level == level else []
+
+    def ancestors(self, node: Gebied) -> List[Gebied]:
+        """Parent chain from node upwards, nearest first"""
+        depth = LEVELS.index(node.level)
+        if depth:
+            self.ensure(*LEVELS[:depth])
+        chain = []
+        while node.parent_id and node.parent_id in self._by_id:
+            node = self._by_id[node.parent_id]
+            chain.append(node)
+        return chain
+
+
+GEBIEDEN_INDEX = GebiedenIndex()
+
+
+def level_names(level: str, fallback: Sequence[str]) -> List[str]:
+    """
+    Names of all areas at a level, for expanding an "all areas" default.
+
+    Returns fallback when the index is unavailable or empty.
+    """
+    try:
+        names = [n.naam for n in GEBIEDEN_INDEX.at_level(level) if n.naam]
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Gebieden index unavailable, using built-in {level} list: {e}")
+        return list(fallback)
+    return names or list(fallback)
+
+
+def resolve_filter(value: Optional[str], level: str, attr: str = "naam") -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Validate a tool's area filter against the index.
+
+    Args:
+        value: Filter value as given by the caller (name, code or identificatie)
+        level: Expected gebied level
+        attr: Gebied attribute the upstream API filters on
+
+    Returns:
+        (canonical value, None) when valid or when the index is unavailable,
+        (None, error dict with suggestions) when the value is unknown
+    """
+    if not value:
+        return value, None
+    try:
+        node = GEBIEDEN_INDEX.resolve(value, level)
+        if node:
+            return getattr(node, attr) or value, None
+        suggestions = [n.naam for n in GEBIEDEN_INDEX.search(value, level, limit=5)]
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Gebieden index unavailable, not validating {level} filter: {e}")
+        return value, None
+    return None, {
+        "error": f"Unknown {level}: {value}",
+        "suggestions": suggestions
+    }
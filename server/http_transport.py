@@ -0,0 +1,278 @@
+"""Streamable HTTP transport for the MCP server
+
+Serves many MCP sessions from one process so all clients share the same
+in-process caches. Clients POST JSON-RPC messages to /mcp; the session id
+issued on `initialize` is passed back in the `Mcp-Session-Id` header.
+Tool calls that carry a progressToken and accept `text/event-stream` get
+their progress notifications streamed as SSE events before the result.
+
+Access control:
+    - Requests carrying an `Origin` header that is not allowed get 403, as the
+      Streamable HTTP spec requires against DNS rebinding
+    - With an auth token configured, every request needs
+      `Authorization: Bearer <token>` (401 otherwise); binding to anything
+      but loopback without a token is refused
+
+Backpressure:
+    - workers: tool calls executing at once across all sessions; further
+      calls wait for a free worker
+    - max_inflight: requests one session may have open at once; excess
+      requests are rejected with 429
+    - max_sessions: live sessions; new `initialize` calls get 503 when full
+    - idle_timeout: sessions without activity for this long are dropped,
+      unless they still have a request in flight
+"""
+import hmac
+import ipaddress
+import json
+import logging
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger("amsterdam-mcp")
+
+# handle_request(message, send) -> response or None
+Handler = Callable[[Dict[str, Any], Callable[[Dict[str, Any]], None]], Optional[Dict[str, Any]]]
+
+SESSION_HEADER = "Mcp-Session-Id"
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class Session:
+    """Per-client state: requests in flight and last activity time"""
+    __slots__ = ("id", "active", "last_seen")
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.active = 0
+        self.last_seen = time.monotonic()
+
+
+class SessionRegistry:
+    """Thread-safe session table with idle expiry and per-session in-flight limits"""
+
+    def __init__(self, max_sessions: int, max_inflight: int, idle_timeout: float):
+        self.max_sessions = max_sessions
+        self.max_inflight = max_inflight
+        self.idle_timeout = idle_timeout
+        self._sessions: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+
+    def create(self) -> Optional[Session]:
+        """Open a session, or return None when the server is full"""
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                return None
+            session = Session()
+            self._sessions[session.id] = session
+            return session
+
+    def get(self, session_id: Optional[str]) -> Optional[Session]:
+        """Return a live session, or None when unknown or expired"""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id or "")
+            if session:
+                session.last_seen = time.monotonic()
+            return session
+
+    def begin(self, session: Session) -> bool:
+        """Take an in-flight slot for session; False when it is at max_inflight"""
+        with self._lock:
+            if session.active >= self.max_inflight:
+                return False
+            session.active += 1
+            session.last_seen = time.monotonic()
+            return True
+
+    def end(self, session: Session) -> None:
+        with self._lock:
+            session.active -= 1
+            session.last_seen = time.monotonic()
+
+    def close(self, session_id: Optional[str]) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id or "", None) is not None
+
+    def _expire(self) -> None:
+        # Sessions with a request in flight are never expired mid-call
+        cutoff = time.monotonic() - self.idle_timeout
+        for sid in [sid for sid, s in self._sessions.items() if s.last_seen < cutoff and not s.active]:
+            del self._sessions[sid]
+
+
+class MCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handle: Handler, sessions: SessionRegistry, workers: int,
+                 allowed_origins: Iterable[str] = (), auth_token: Optional[str] = None):
+        super().__init__(address, MCPRequestHandler)
+        self.handle = handle
+        self.sessions = sessions
+        self.workers = threading.BoundedSemaphore(workers)
+        port = self.server_address[1]
+        self.allowed_origins = {f"http://localhost:{port}", f"http://127.0.0.1:{port}", *allowed_origins}
+        self.auth_token = auth_token
+
+
+class MCPRequestHandler(BaseHTTPRequestHandler):
+    server: MCPServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, body: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int, code: int, message: str, msg_id: Any = None, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send_json(status, {"jsonrpc": "2.0", "id": msg_id, "error": {"code": code, "message": message}}, headers)
+
+    def _authorize(self) -> bool:
+        """Check Origin and bearer token; sends the error response and returns False on failure"""
+        origin = self.headers.get("Origin")
+        if origin is not None and origin not in self.server.allowed_origins:
+            self._error(403, -32000, f"Origin not allowed: {origin}")
+            return False
+        token = self.server.auth_token
+        if token:
+            supplied = self.headers.get("Authorization", "")
+            if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+                self._error(401, -32001, "Missing or invalid bearer token", headers={"WWW-Authenticate": "Bearer"})
+                return False
+        return True
+
+    def do_GET(self) -> None:
+        if not self._authorize():
+            return
+        # No server-initiated messages, so there is no standalone SSE stream
+        self._send_json(405, None, {"Allow": "POST, DELETE"})
+
+    def do_DELETE(self) -> None:
+        if not self._authorize():
+            return
+        if self.path.rstrip("/") != "/mcp":
+            return self._send_json(404, None)
+        closed = self.server.sessions.close(self.headers.get(SESSION_HEADER))
+        self._send_json(204 if closed else 404, None)
+
+    def do_POST(self) -> None:
+        if not self._authorize():
+            return
+        if self.path.rstrip("/") != "/mcp":
+            return self._send_json(404, None)
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            req = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            return self._error(400, -32700, f"Parse error: {e}")
+        if not isinstance(req, dict):
+            return self._error(400, -32600, "Batch requests are not supported")
+
+        if req.get("method") == "initialize":
+            session = self.server.sessions.create()
+            if session is None:
+                return self._error(503, -32000, "Too many sessions", req.get("id"), {"Retry-After": "5"})
+        else:
+            session = self.server.sessions.get(self.headers.get(SESSION_HEADER))
+            if session is None:
+                return self._error(404, -32001, "Unknown or expired session", req.get("id"))
+
+        if not self.server.sessions.begin(session):
+            return self._error(429, -32000, "Too many requests in flight for this session", req.get("id"), {"Retry-After": "1"})
+        try:
+            self._dispatch(req, session)
+        finally:
+            self.server.sessions.end(session)
+
+    def _dispatch(self, req: Dict[str, Any], session: Session) -> None:
+        headers = {SESSION_HEADER: session.id}
+        if "id" not in req:
+            self.server.handle(req, lambda msg: None)
+            return self._send_json(202, None, headers)
+
+        params = req.get("params") or {}
+        wants_stream = (req.get("method") == "tools/call"
+                        and (params.get("_meta") or {}).get("progressToken") is not None
+                        and "text/event-stream" in self.headers.get("Accept", ""))
+
+        with self.server.workers:
+            if not wants_stream:
+                res = self.server.handle(req, lambda msg: None)
+                return self._send_json(200 if res else 202, res, headers)
+
+            self.send_response(200)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def send_event(msg: Dict[str, Any]) -> None:
+                self.wfile.write(f"event: message\ndata: {json.dumps(msg)}\n\n".encode())
+                self.wfile.flush()
+
+            res = self.server.handle(req, send_event)
+            if res:
+                send_event(res)
+
+
+def serve_http(
+    handle: Handler,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    workers: int = 8,
+    max_sessions: int = 64,
+    max_inflight: int = 4,
+    idle_timeout: float = 3600.0,
+    allowed_origins: Iterable[str] = (),
+    auth_token: Optional[str] = None
+) -> None:
+    """
+    Serve MCP over Streamable HTTP at http://host:port/mcp until interrupted.
+
+    Args:
+        handle: JSON-RPC handler shared with the stdio transport
+        host: Interface to bind
+        port: Port to bind
+        workers: Tool calls executing concurrently across all sessions
+        max_sessions: Maximum live sessions
+        max_inflight: Maximum concurrent requests per session
+        idle_timeout: Seconds of inactivity before a session is dropped
+        allowed_origins: Browser origins allowed besides http://localhost:port
+        auth_token: Bearer token required on every request; mandatory when
+            host is not a loopback address
+    """
+    if not auth_token and not is_loopback(host):
+        raise ValueError(f"Refusing to serve on {host} without an auth token")
+    sessions = SessionRegistry(max_sessions, max_inflight, idle_timeout)
+    httpd = MCPServer((host, port), handle, sessions, workers, allowed_origins, auth_token)
+    logger.info(f"Listening on http://{host}:{port}/mcp (workers={workers}, max_sessions={max_sessions})")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
@@ -0,0 +1,257 @@
+"""HAL pagination helpers for the Amsterdam DSO API
+
+The DSO API returns pages of `_embedded` items with a `_links.next.href`
+pointing at the following page. Tools use `stream_pages` to walk those links
+one page at a time, so a caller can stop early, report progress per page,
+or hand the next link back to the client as a continuation cursor.
+
+When the optional `ijson` package is installed, `stream_pages` decodes the
+`_embedded` items one at a time straight from the response stream, so a
+caller that filters or maps items as they arrive never holds the whole
+decoded page. Items are built by ijson's C backend (`ijson.items`); the
+next link and page count are read afterwards from the first and last
+EDGE_BYTES of the stream, which is all that is kept of the raw page.
+Without ijson each page is decoded with `response.json()`.
+
+Cursors come from clients and are sent with the API key, so every cursor
+and next link must point at the tool's own endpoint (`check_cursor`).
+"""
+import io
+import json
+import posixpath
+import requests
+import urllib3
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+# Called after every page with (pages_fetched, total_pages, items_fetched).
+# total_pages is None when the API did not report a page count.
+ProgressCallback = Callable[[int, Optional[int], int], None]
+
+# Bytes kept from each end of a streamed page to find `_links` and `page`
+EDGE_BYTES = 64 * 1024
+
+
+class InvalidCursor(requests.exceptions.InvalidURL):
+    """A continuation cursor that does not point at the tool's own endpoint"""
+
+
+def check_cursor(cursor: str, url: str) -> None:
+    """Raise InvalidCursor unless cursor has url's scheme, host and path prefix"""
+    c, u = urlsplit(cursor), urlsplit(url)
+    if (c.scheme, c.netloc) != (u.scheme, u.netloc) \
+            or posixpath.normpath(c.path) + "/" != c.path.rstrip("/") + "/" \
+            or not c.path.startswith(u.path):
+        raise InvalidCursor(f"Invalid cursor: must be a next link of {url}")
+
+
+def next_link(data: Dict[str, Any]) -> Optional[str]:
+    """Return the href of the next HAL page, if any"""
+    nxt = data.get("_links", {}).get("next")
+    if isinstance(nxt, dict):
+        return nxt.get("href")
+    return None
+
+
+def total_pages(data: Dict[str, Any]) -> Optional[int]:
+    """Return the total page count reported with `_count=true`, if any"""
+    page = data.get("page")
+    if isinstance(page, dict):
+        return page.get("totalPages")
+    return None
+
+
+class _EdgeReader:
+    """File-like view of a byte stream that remembers its first and last bytes"""
+
+    def __init__(self, raw: Any):
+        self.raw = raw
+        self.head = b""
+        self.tail = b""
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.raw.read(size)
+        if len(self.head) < EDGE_BYTES:
+            self.head += chunk[:EDGE_BYTES - len(self.head)]
+        self.tail = (self.tail + chunk)[-EDGE_BYTES:]
+        return chunk
+
+
+class Page:
+    """
+    One upstream page whose `_embedded` items are decoded lazily.
+
+    `next_cursor` and `total_pages` are only known once `items()` has been
+    consumed, because the HAL links may follow the items in the document.
+    """
+
+    def __init__(self, response: requests.Response, embedded_key: str):
+        self.response = response
+        self.embedded_key = embedded_key
+        self.next_cursor: Optional[str] = None
+        self.total_pages: Optional[int] = None
+        self.count = 0
+        self._items: Optional[Iterator[Dict[str, Any]]] = None
+
+    def items(self) -> Iterator[Dict[str, Any]]:
+        """Iterate the page's items; can only be consumed once"""
+        if self._items is None:
+            self._items = self._stream() if HAS_IJSON else self._decode()
+        return self._items
+
+    def drain(self) -> None:
+        """Consume any items the caller did not read, to learn the next cursor"""
+        for _ in self.items():
+            pass
+
+    def _decode(self) -> Iterator[Dict[str, Any]]:
+        data = self.response.json()
+        self.next_cursor = next_link(data)
+        self.total_pages = total_pages(data)
+        for item in data.get("_embedded", {}).get(self.embedded_key, []):
+            self.count += 1
+            yield item
+
+    def _stream(self) -> Iterator[Dict[str, Any]]:
+        # Reading response.raw bypasses requests' error wrapping, so map
+        # transport and decode failures back onto requests exceptions
+        try:
+            yield from self._parse()
+        except urllib3.exceptions.HTTPError as e:
+            raise requests.exceptions.ConnectionError(e, response=self.response)
+        except ijson.JSONError as e:
+            raise requests.exceptions.InvalidJSONError(e, response=self.response)
+
+    def _parse(self) -> Iterator[Dict[str, Any]]:
+        self.response.raw.decode_content = True
+        reader = _EdgeReader(self.response.raw)
+        for item in ijson.items(reader, f"_embedded.{self.embedded_key}.item", use_float=True):
+            self.count += 1
+            yield item
+        self._scan_head(reader.head)
+        self._scan_tail(reader.tail)
+
+    def _scan_head(self, head: bytes) -> None:
+        # HAL documents usually open with `_links`; stop at `_embedded`
+        try:
+            for prefix, event, value in ijson.parse(io.BytesIO(head)):
+                if prefix == "" and event == "map_key" and value == "_embedded":
+                    return
+                if prefix == "_links.next.href" and event == "string":
+                    self.next_cursor = value
+                elif prefix == "page.totalPages" and event == "number":
+                    self.total_pages = int(value)
+        except ijson.IncompleteJSONError:
+            pass
+
+    def _scan_tail(self, tail: bytes, attempts: int = 3) -> None:
+        # Top-level keys after `_embedded`: `{` + the bytes from such a key to
+        # the end only parse as JSON when the key is at the document's top level
+        for key in (b'"page"', b'"_links"'):
+            pos = tail.rfind(key)
+            for _ in range(attempts):
+                if pos < 0:
+                    break
+                try:
+                    data = json.loads(b"{" + tail[pos:])
+                except ValueError:
+                    pos = tail.rfind(key, 0, pos)
+                    continue
+                self.next_cursor = next_link(data) or self.next_cursor
+                self.total_pages = total_pages(data) or self.total_pages
+                break
+
+
+def stream_pages(
+    url: str,
+    embedded_key: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    cursor: Optional[str] = None,
+    max_pages: Optional[int] = 1,
+    on_progress: Optional[ProgressCallback] = None,
+    timeout: int = 30
+) -> Iterator[Page]:
+    """
+    Fetch HAL pages one at a time, following `_links.next`, decoding lazily.
+
+    Args:
+        url: Collection endpoint
+        embedded_key: Key of the item list inside `_embedded`
+        params: Query parameters for the first page
+        headers: Request headers (API key)
+        cursor: Next-page href returned by a previous call; replaces url/params.
+            Must point at `url` (see check_cursor), otherwise InvalidCursor
+            is raised before any request is made
+        max_pages: Stop after this many pages (None for all pages)
+        on_progress: Called after each page, see ProgressCallback
+        timeout: Per-request timeout in seconds
+
+    Yields:
+        Page per upstream page; read `page.next_cursor` after its items
+    """
+    base_url = url
+    if cursor:
+        check_cursor(cursor, base_url)
+        url, params = cursor, None
+    else:
+        params = dict(params or {})
+        if on_progress:
+            params.setdefault("_count", "true")
+
+    pages = 0
+    fetched = 0
+    total = None
+    while url:
+        response = requests.get(url, params=params, headers=headers, timeout=timeout, stream=True)
+        try:
+            response.raise_for_status()
+            page = Page(response, embedded_key)
+            yield page
+            page.drain()
+        finally:
+            response.close()
+
+        url, params = page.next_cursor, None
+        if url:
+            check_cursor(url, base_url)
+        pages += 1
+        fetched += page.count
+        total = page.total_pages or total
+
+        if on_progress:
+            on_progress(pages, total, fetched)
+
+        if max_pages is not None and pages >= max_pages:
+            break
+
+
+def iter_pages(
+    url: str,
+    embedded_key: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    cursor: Optional[str] = None,
+    max_pages: Optional[int] = 1,
+    on_progress: Optional[ProgressCallback] = None,
+    timeout: int = 30
+) -> Iterator[Tuple[List[Dict[str, Any]], Optional[str]]]:
+    """
+    Fetch HAL pages one at a time, following `_links.next`.
+
+    Same arguments as `stream_pages`, for callers that want each page's
+    items as a list.
+
+    Yields:
+        (items, next_cursor) per page; next_cursor is None on the last page
+    """
+    for page in stream_pages(url, embedded_key, params, headers, cursor,
+                             max_pages, on_progress, timeout):
+        items = list(page.items())
+        yield items, page.next_cursor
@@ -0,0 +1,111 @@
+"""Compact columnar storage for snapshot datasets
+
+Keeping a dataset resident as a list of dicts costs a dict plus a copy of
+every repeated string per row. RecordStore keeps one list per field instead,
+interns repeated strings (fractie, eigenaar, stadsdeel, status, ...) so each
+distinct value is stored once, and keeps point coordinates in typed
+`array('d')` columns. Filters run over the columns and return row indices;
+dicts are only built for the rows that are actually returned.
+"""
+import math
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class RecordStore:
+    """Column-oriented record set with optional point coordinates"""
+    __slots__ = ("fields", "interned", "columns", "xs", "ys")
+
+    def __init__(self, fields: Sequence[str], interned: Iterable[str] = ()):
+        """
+        Args:
+            fields: Output field names, in result order
+            interned: Fields with few distinct values whose strings are interned
+        """
+        self.fields = tuple(fields)
+        self.interned = frozenset(interned)
+        self.columns: Dict[str, List[Any]] = {f: [] for f in self.fields}
+        self.xs = array("d")
+        self.ys = array("d")
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def append(self, values: Dict[str, Any], x: Optional[float] = None, y: Optional[float] = None) -> None:
+        """Add a row; missing coordinates are stored as NaN"""
+        for f in self.fields:
+            v = values.get(f)
+            self.columns[f].append(_intern(v) if f in self.interned else v)
+        self.xs.append(math.nan if x is None else x)
+        self.ys.append(math.nan if y is None else y)
+
+    def within(self, x: float, y: float, radius: float,
+               indices: Optional[Iterable[int]] = None) -> List[Tuple[float, int]]:
+        """Return (distance, index) for rows within radius of (x, y), nearest first"""
+        xs, ys = self.xs, self.ys
+        hits = []
+        for i in (range(len(self)) if indices is None else indices):
+            d = math.hypot(xs[i] - x, ys[i] - y)
+            if d <= radius:  # NaN coordinates never match
+                hits.append((d, i))
+        hits.sort()
+        return hits
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Materialize row i as a dict, with a GeoJSON Point when it has coordinates"""
+        out = {f: self.columns[f][i] for f in self.fields}
+        x, y = self.xs[i], self.ys[i]
+        out["geometry"] = None if math.isnan(x) else {"type": "Point", "coordinates": [x, y]}
+        return out
+
+
+class SnapshotCache:
+    """Thread-safe TTL cache for resident snapshots, keyed by query
+
+    Expired entries are dropped on every lookup, and at most `max_entries`
+    snapshots stay resident; the least recently used one goes first.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 16):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling load() when missing or stale"""
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = load()
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def _expire(self, now: float) -> None:
+        for key in [k for k, (loaded, _) in self._entries.items() if now - loaded >= self.ttl]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,333 @@
+"""Bulk export of objectenopenbareruimte datasets to local files
+
+Fetches a full dataset in parallel partitions (one per stadsdeel, or one per
+page range) and streams each page straight to disk, so memory use is bounded
+by a single page per worker. Every partition keeps a small checkpoint file
+next to its output; re-running the same export resumes where it stopped.
+Only a manifest with file paths and row counts is returned.
+
+Files are only written below the server-configured export root
+(`AMSTERDAM_EXPORT_ROOT`, default `./exports`); `output_dir` is resolved
+relative to it and may not point outside it.
+
+Parquet output requires the optional `pyarrow` package. Geometry is stored as
+a GeoJSON string column.
+"""
+import json
+import math
+import os
+import re
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+from server.gebieden_index import level_names, resolve_filter
+from server.paging import ProgressCallback, stream_pages
+from server.tools.get_infrastructure import BASE_URL, ENDPOINT_MAP, MAX_PAGE_SIZE, map_infrastructure_item
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+load_dotenv()
+
+# Used when the gebieden index cannot be loaded
+STADSDELEN = ["Centrum", "Nieuw-West", "Noord", "Oost", "West", "Weesp", "Westpoort", "Zuid", "Zuidoost"]
+
+EXPORT_ROOT_ENV = "AMSTERDAM_EXPORT_ROOT"
+
+# Upper bound on parallel partitions (threads and upstream requests) per export
+MAX_WORKERS = 16
+
+PART_RE = re.compile(r"^part-(\d{5})\.parquet$")
+
+
+def export_root() -> str:
+    """Absolute, symlink-free directory all exports are confined to"""
+    return os.path.realpath(os.getenv(EXPORT_ROOT_ENV, "exports"))
+
+
+def resolve_output_dir(output_dir: str) -> Optional[str]:
+    """Resolve output_dir below the export root; None when it escapes the root"""
+    root = export_root()
+    path = os.path.realpath(os.path.join(root, output_dir))
+    if os.path.commonpath([root, path]) != root:
+        return None
+    return path
+
+
+def _slug(value: str) -> str:
+    """File-name-safe form of a partition value"""
+    return re.sub(r"[^A-Za-z0-9-]+", "_", value).strip("_") or "_"
+
+
+def _new_state() -> Dict[str, Any]:
+    return {"cursor": None, "pages": 0, "rows": 0, "offset": 0, "complete": False}
+
+
+def _load_state(path: str) -> Dict[str, Any]:
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return _new_state()
+
+
+def _save_state(path: str, state: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _output_intact(name: str, out_dir: str, file_format: str, state: Dict[str, Any]) -> bool:
+    """Whether the files a checkpoint refers to are still on disk"""
+    if file_format == "ndjson":
+        path = os.path.join(out_dir, f"{name}.ndjson")
+        return os.path.exists(path) and os.path.getsize(path) >= state["offset"]
+    return not state["rows"] or os.path.isdir(os.path.join(out_dir, name))
+
+
+def _export_partition(
+    partition: Dict[str, Any],
+    url: str,
+    endpoint: str,
+    object_type: str,
+    headers: Dict[str, str],
+    out_dir: str,
+    file_format: str,
+    resume: bool,
+    on_page
+) -> Dict[str, Any]:
+    """Fetch one partition page by page, appending each page to disk and checkpointing"""
+    name = partition["name"]
+    state_path = os.path.join(out_dir, f"{name}.state.json")
+    state = _load_state(state_path) if resume else _new_state()
+    # Output deleted or cut short since the checkpoint: start the partition over
+    if state["pages"] and not _output_intact(name, out_dir, file_format, state):
+        state = _new_state()
+    # A checkpoint past the last page without a cursor means nothing is left
+    if state["pages"] and state["cursor"] is None:
+        state["complete"] = True
+    if state["complete"]:
+        return {**_manifest_entry(name, out_dir, file_format, state), "resumed": True}
+
+    remaining = None
+    if partition["max_pages"] is not None:
+        remaining = partition["max_pages"] - state["pages"]
+
+    resumed = state["pages"] > 0
+    out = None
+    try:
+        if file_format == "ndjson":
+            path = os.path.join(out_dir, f"{name}.ndjson")
+            # Drop any page written after the last checkpoint
+            out = open(path, "r+b" if state["offset"] and os.path.exists(path) else "wb")
+            out.truncate(state["offset"])
+            out.seek(state["offset"])
+        else:
+            part_dir = os.path.join(out_dir, name)
+            os.makedirs(part_dir, exist_ok=True)
+            for fname in os.listdir(part_dir):
+                match = PART_RE.match(fname)
+                if match and int(match.group(1)) > state["pages"]:
+                    os.remove(os.path.join(part_dir, fname))
+
+        if remaining != 0:
+            for page in stream_pages(url, endpoint, partition["params"], headers,
+                                     cursor=state["cursor"], max_pages=remaining):
+                if file_format == "ndjson":
+                    # Rows go to disk as they are decoded; the page is never held whole
+                    for item in page.items():
+                        row = map_infrastructure_item(item, object_type)
+                        out.write(json.dumps(row, ensure_ascii=False).encode())
+                        out.write(b"\n")
+                    out.flush()
+                    os.fsync(out.fileno())
+                    state["offset"] = out.tell()
+                else:
+                    rows = []
+                    for item in page.items():
+                        row = map_infrastructure_item(item, object_type)
+                        row["geometry"] = json.dumps(row["geometry"]) if row["geometry"] is not None else None
+                        rows.append(row)
+                    if rows:
+                        pq.write_table(pa.Table.from_pylist(rows),
+                                       os.path.join(part_dir, f"part-{state['pages'] + 1:05d}.parquet"))
+
+                state["pages"] += 1
+                state["rows"] += page.count
+                state["cursor"] = page.next_cursor
+                _save_state(state_path, state)
+                on_page(page.count)
+        state["complete"] = True
+        _save_state(state_path, state)
+        error = None
+    except requests.exceptions.RequestException as e:
+        error = f"Failed to fetch partition {name}: {e}"
+    except (OSError, ValueError) as e:
+        # Disk full, permissions, or a value Parquet cannot encode
+        error = f"Failed to write partition {name}: {e}"
+    finally:
+        if out is not None:
+            out.close()
+
+    entry = {**_manifest_entry(name, out_dir, file_format, state), "resumed": resumed}
+    if error:
+        entry["error"] = error
+    return entry
+
+
+def _manifest_entry(name: str, out_dir: str, file_format: str, state: Dict[str, Any]) -> Dict[str, Any]:
+    if file_format == "ndjson":
+        files = [os.path.join(out_dir, f"{name}.ndjson")]
+    else:
+        part_dir = os.path.join(out_dir, name)
+        files = sorted(os.path.join(part_dir, f) for f in os.listdir(part_dir) if PART_RE.match(f)) \
+            if os.path.isdir(part_dir) else []
+    return {
+        "partition": name,
+        "files": files,
+        "rows": state["rows"],
+        "pages": state["pages"],
+        "complete": state["complete"]
+    }
+
+
+def export_dataset(
+    object_type: str = "verhardingen",
+    output_dir: str = ".",
+    partition_by: str = "stadsdeel",
+    stadsdelen: Optional[List[str]] = None,
+    file_format: str = "ndjson",
+    page_size: int = 1000,
+    workers: int = 4,
+    resume: bool = True,
+    on_progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    Export a full objectenopenbareruimte dataset to local NDJSON or Parquet files.
+
+    Args:
+        object_type: "verhardingen", "groenobjecten" or "terreindeel"
+        output_dir: Directory below the export root (AMSTERDAM_EXPORT_ROOT) to
+            write to; files go in output_dir/object_type/
+        partition_by: "stadsdeel" (one partition per district) or "pages"
+            (the whole dataset split into `workers` page ranges)
+        stadsdelen: Districts to export when partitioning by stadsdeel
+            (default: all stadsdelen in the gebieden index)
+        file_format: "ndjson" or "parquet"
+        page_size: Objects per upstream page (1 to MAX_PAGE_SIZE)
+        workers: Partitions fetched in parallel (1 to MAX_WORKERS)
+        resume: Continue from existing checkpoints instead of starting over
+        on_progress: Called after each page written, across all partitions
+
+    Returns:
+        Manifest with per-partition file paths and row counts
+    """
+    if object_type not in ENDPOINT_MAP:
+        return {"error": f"Unknown object_type: {object_type}", "valid_types": list(ENDPOINT_MAP)}
+    if file_format not in ("ndjson", "parquet"):
+        return {"error": f"Unknown file_format: {file_format}", "valid_formats": ["ndjson", "parquet"]}
+    if file_format == "parquet" and not HAS_PYARROW:
+        return {"error": "Parquet export requires pyarrow", "note": "pip install pyarrow, or use file_format='ndjson'"}
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        return {"error": f"page_size must be between 1 and {MAX_PAGE_SIZE}: {page_size}"}
+    if not 1 <= workers <= MAX_WORKERS:
+        return {"error": f"workers must be between 1 and {MAX_WORKERS}: {workers}"}
+
+    api_key = os.getenv("AMSTERDAM_API_KEY")
+    endpoint = ENDPOINT_MAP[object_type]
+    url = f"{BASE_URL}{endpoint}/"
+
+    headers = {}
+    if api_key:
+        headers["X-Api-Key"] = api_key
+
+    base_dir = resolve_output_dir(output_dir)
+    if base_dir is None:
+        return {"error": f"output_dir must stay inside the export root: {output_dir}",
+                "note": f"Set {EXPORT_ROOT_ENV} on the server to change the root"}
+    out_dir = os.path.join(base_dir, object_type)
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+    except OSError as e:
+        return {"error": f"Cannot create {out_dir}: {e}"}
+
+    partitions = []
+    total_pages = None
+    if partition_by == "stadsdeel":
+        if stadsdelen:
+            resolved = []
+            for value in stadsdelen:
+                naam, invalid = resolve_filter(value, "stadsdeel")
+                if invalid:
+                    return invalid
+                resolved.append(naam)
+            stadsdelen = resolved
+        for naam in stadsdelen or level_names("stadsdeel", STADSDELEN):
+            partitions.append({
+                "name": f"stadsdeel={_slug(naam)}",
+                "params": {"_pageSize": page_size, "ligtInStadsdeel": naam},
+                "max_pages": None
+            })
+    elif partition_by == "pages":
+        try:
+            response = requests.get(url, params={"_pageSize": 1, "_count": "true"}, headers=headers, timeout=30)
+            response.raise_for_status()
+            total = response.json().get("page", {}).get("totalElements") or 0
+        except requests.exceptions.RequestException as e:
+            return {
+                "error": f"Failed to count {object_type}: {str(e)}",
+                "note": "Ensure AMSTERDAM_API_KEY is set in .env file"
+            }
+        total_pages = math.ceil(total / page_size)
+        per_worker = max(1, math.ceil(total_pages / workers))
+        for start in range(1, total_pages + 1, per_worker):
+            count = min(per_worker, total_pages - start + 1)
+            partitions.append({
+                "name": f"pages={start}-{start + count - 1}",
+                "params": {"_pageSize": page_size, "page": start},
+                "max_pages": count
+            })
+    else:
+        return {"error": f"Unknown partition_by: {partition_by}", "valid_partitions": ["stadsdeel", "pages"]}
+
+    lock = threading.Lock()
+    progress = {"pages": 0, "rows": 0}
+
+    def on_page(rows: int) -> None:
+        with lock:
+            progress["pages"] += 1
+            progress["rows"] += rows
+            if on_progress:
+                on_progress(progress["pages"], total_pages, progress["rows"])
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        entries = list(pool.map(
+            lambda p: _export_partition(p, url, endpoint, object_type, headers, out_dir, file_format, resume, on_page),
+            partitions
+        ))
+
+    manifest = {
+        "object_type": object_type,
+        "format": file_format,
+        "output_dir": out_dir,
+        "partition_by": partition_by,
+        "total_rows": sum(e["rows"] for e in entries),
+        "complete": all(e["complete"] for e in entries),
+        "partitions": entries,
+        "source": "Amsterdam Public Infrastructure API"
+    }
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    try:
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        manifest["manifest_path"] = manifest_path
+    except OSError as e:
+        manifest["error"] = f"Failed to write manifest: {e}"
+    return manifest
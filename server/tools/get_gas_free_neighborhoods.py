@@ -3,6 +3,8 @@ import os
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
+from server.gebieden_index import resolve_filter
+
 # Load environment variables
 load_dotenv()
 
@@ -16,7 +18,8 @@ def get_gas_free_neighborhoods(
     Shows realized or planned gas-free areas for energy transition.
     
     Args:
-        buurt_code: Neighborhood code to filter results
+        buurt_code: Neighborhood code to filter results; a buurt name or
+            vollcode is resolved to its code
         status: Status filter (e.g., "gerealiseerd", "gepland")
         limit: Maximum number of results (default 20)
     
@@ -35,6 +38,9 @@ def get_gas_free_neighborhoods(
         "_pageSize": limit
     }
     
+    buurt_code, invalid = resolve_filter(buurt_code, "buurt", attr="code")
+    if invalid:
+        return invalid
     if buurt_code:
         params["buurtCode"] = buurt_code
     if status:
@@ -0,0 +1,74 @@
+import requests
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+
+from server.gebieden_index import GEBIEDEN_INDEX, LEVELS
+
+load_dotenv()
+
+def get_gebied_hierarchy(
+    query: str,
+    gebied_type: Optional[str] = None,
+    relation: str = "self",
+    target_type: Optional[str] = None,
+    limit: int = 20
+) -> Dict[str, Any]:
+    """
+    Navigate the Amsterdam stadsdeel -> wijk -> buurt -> bouwblok hierarchy.
+    Answers come from an in-memory index, so no per-query API calls are needed.
+
+    Args:
+        query: Code, vollcode, identificatie or (partial/misspelled) name
+        gebied_type: Restrict matching to one level ('stadsdeel', 'wijk', 'buurt', 'bouwblok')
+        relation: What to return for the best match:
+            - "self" (matching areas)
+            - "children" (areas directly below it)
+            - "ancestors" (wijk, stadsdeel above it)
+            - "descendants" (all areas of target_type below it)
+        target_type: Level for "descendants" (default: one level down)
+        limit: Maximum number of results (default 20)
+
+    Returns:
+        Dictionary with the matched area and the requested related areas
+    """
+    if gebied_type and gebied_type not in LEVELS:
+        return {"error": f"Unknown gebied_type: {gebied_type}", "valid_types": list(LEVELS)}
+    if relation not in ("self", "children", "ancestors", "descendants"):
+        return {"error": f"Unknown relation: {relation}", "valid_relations": ["self", "children", "ancestors", "descendants"]}
+
+    try:
+        node = GEBIEDEN_INDEX.get(query, gebied_type)
+        matches = [node] if node else GEBIEDEN_INDEX.search(query, gebied_type, limit=limit)
+        if not matches:
+            return {"query": query, "gebied_type": gebied_type, "match": None, "results": [], "count": 0}
+
+        match = matches[0]
+        if relation == "self":
+            results = matches
+        elif relation == "children":
+            results = GEBIEDEN_INDEX.children(match)
+        elif relation == "ancestors":
+            results = GEBIEDEN_INDEX.ancestors(match)
+        else:
+            depth = LEVELS.index(match.level)
+            target = target_type or LEVELS[min(depth + 1, len(LEVELS) - 1)]
+            if target not in LEVELS or LEVELS.index(target) <= depth:
+                return {"error": f"target_type must be below {match.level}", "valid_types": list(LEVELS[depth + 1:])}
+            results = GEBIEDEN_INDEX.descendants(match, target)
+
+        return {
+            "query": query,
+            "gebied_type": gebied_type,
+            "relation": relation,
+            "match": match.to_dict(),
+            "count": len(results),
+            "results": [n.to_dict() for n in results[:limit]],
+            "source": "Amsterdam Gebieden API v1 (in-memory index)"
+        }
+
+    except requests.exceptions.RequestException as e:
+        return {
+            "error": f"Failed to load gebieden index: {str(e)}",
+            "query": query,
+            "note": "Ensure AMSTERDAM_API_KEY is set in .env file"
+        }
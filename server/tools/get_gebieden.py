@@ -3,18 +3,30 @@ import os
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
+from server.paging import ProgressCallback, stream_pages
+
 load_dotenv()
 
-def get_gebieden(gebied_type: str = "buurt", naam: Optional[str] = None) -> Dict[str, Any]:
+def get_gebieden(
+    gebied_type: str = "buurt",
+    naam: Optional[str] = None,
+    cursor: Optional[str] = None,
+    max_pages: Optional[int] = 1,
+    on_progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
     """
     Get Amsterdam district/neighborhood boundaries and information.
     
     Args:
         gebied_type: Type of area ('stadsdeel', 'wijk', 'buurt', 'bouwblok')
         naam: Optional name filter
+        cursor: `next_cursor` from a previous call, to continue where it stopped
+        max_pages: Number of 100-area pages to fetch (None for all)
+        on_progress: Called after each fetched page
     
     Returns:
-        Dictionary containing area boundaries and metadata
+        Dictionary containing area boundaries and metadata, with a
+        `next_cursor` when more pages are available
     """
     api_key = os.getenv("AMSTERDAM_API_KEY")
     
@@ -37,30 +49,32 @@ def get_gebieden(gebied_type: str = "buurt", naam: Optional[str] = None) -> Dict
         params["naam"] = naam
     
     try:
-        response = requests.get(base_url, params=params, headers=headers, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
         results = []
-        items = data.get("_embedded", {}).get(endpoint, [])
-        
-        for item in items:
-            results.append({
-                "id": item.get("identificatie"),
-                "code": item.get("code"),
-                "naam": item.get("naam"),
-                "vollcode": item.get("vollcode"),
-                "begin_geldigheid": item.get("beginGeldigheid"),
-                "einde_geldigheid": item.get("eindeGeldigheid"),
-                "geometry": item.get("geometrie"),
-                "type": gebied_type
-            })
+        next_cursor = None
+        for page in stream_pages(base_url, endpoint, params, headers,
+                                 cursor=cursor, max_pages=max_pages,
+                                 on_progress=on_progress):
+            # Map each area as it is decoded; the raw page is never held whole
+            for item in page.items():
+                results.append({
+                    "id": item.get("identificatie"),
+                    "code": item.get("code"),
+                    "naam": item.get("naam"),
+                    "vollcode": item.get("vollcode"),
+                    "begin_geldigheid": item.get("beginGeldigheid"),
+                    "einde_geldigheid": item.get("eindeGeldigheid"),
+                    "geometry": item.get("geometrie"),
+                    "type": gebied_type
+                })
+            page.drain()
+            next_cursor = page.next_cursor
         
         return {
             "gebied_type": gebied_type,
             "naam_filter": naam,
             "results": results,
             "count": len(results),
+            "next_cursor": next_cursor,
             "source": "Amsterdam Gebieden API v1 (Authenticated)"
         }
         
@@ -3,12 +3,59 @@ import os
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
+from server.gebieden_index import resolve_filter
+from server.paging import ProgressCallback, stream_pages
+
 load_dotenv()
 
+BASE_URL = "https://api.data.amsterdam.nl/v1/objectenopenbareruimte/"
+
+# Largest `_pageSize` the DSO API accepts
+MAX_PAGE_SIZE = 1000
+
+ENDPOINT_MAP = {
+    "verhardingen": "verhardingen",
+    "groenobjecten": "groenobjecten",
+    "terreindeel": "terreindelen"
+}
+
+def map_infrastructure_item(item: Dict[str, Any], object_type: str) -> Dict[str, Any]:
+    """Map a raw objectenopenbareruimte item to the tool's result shape"""
+    result = {
+        "id": item.get("identificatie"),
+        "object_type": object_type,
+        "stadsdeel": item.get("ligtInStadsdeel"),
+        "buurt": item.get("ligtInBuurt"),
+        "geometry": item.get("geometrie")
+    }
+    
+    if object_type == "verhardingen":
+        result.update({
+            "verhardingstype": item.get("verhardingstype"),
+            "oppervlakte": item.get("oppervlakte"),
+            "wegdeel": item.get("plusTypeVerharding")
+        })
+    elif object_type == "groenobjecten":
+        result.update({
+            "groentype": item.get("plusType"),
+            "oppervlakte": item.get("oppervlakte")
+        })
+    elif object_type == "terreindeel":
+        result.update({
+            "terreintype": item.get("plusType"),
+            "oppervlakte": item.get("oppervlakte")
+        })
+    
+    return result
+
 def get_infrastructure(
     object_type: str = "verhardingen",
     stadsdeel: Optional[str] = None,
-    limit: int = 20
+    limit: Optional[int] = 20,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
+    max_pages: Optional[int] = 1,
+    on_progress: Optional[ProgressCallback] = None
 ) -> Dict[str, Any]:
     """
     Get public space infrastructure objects (pavements, green objects, terrain parts).
@@ -18,74 +65,72 @@ def get_infrastructure(
             - "verhardingen" (pavements/road surfaces)
             - "groenobjecten" (green objects/vegetation)
             - "terreindeel" (terrain parts/land parcels)
-        stadsdeel: District filter (e.g., "Centrum", "West")
-        limit: Maximum number of results (default 20)
+        stadsdeel: District filter, name or code (e.g., "Centrum", "West", "A")
+        limit: Maximum number of results (default 20, None for no cap);
+            fetching stops once it is reached
+        page_size: Objects per upstream page (default: limit, at most 1000).
+            When limit falls mid-page no `next_cursor` is returned, since it
+            would skip the rest of that page; keep limit a multiple of
+            page_size to page through the results
+        cursor: `next_cursor` from a previous call, to continue where it stopped
+        max_pages: Number of pages to fetch (None for all)
+        on_progress: Called after each fetched page
     
     Returns:
-        Dictionary containing public infrastructure object data
+        Dictionary containing public infrastructure object data, with a
+        `next_cursor` when more pages are available and `truncated` when
+        limit cut a page short
     """
     api_key = os.getenv("AMSTERDAM_API_KEY")
     
-    endpoint_map = {
-        "verhardingen": "verhardingen",
-        "groenobjecten": "groenobjecten",
-        "terreindeel": "terreindelen"
-    }
-    
-    endpoint = endpoint_map.get(object_type, "verhardingen")
-    base_url = f"https://api.data.amsterdam.nl/v1/objectenopenbareruimte/{endpoint}/"
+    endpoint = ENDPOINT_MAP.get(object_type, "verhardingen")
+    base_url = f"{BASE_URL}{endpoint}/"
     
     headers = {}
     if api_key:
         headers["X-Api-Key"] = api_key
     
+    if page_size is None:
+        page_size = min(limit, MAX_PAGE_SIZE) if limit else MAX_PAGE_SIZE
+    
     params = {
-        "_pageSize": limit
+        "_pageSize": page_size
     }
     
+    stadsdeel, invalid = resolve_filter(stadsdeel, "stadsdeel")
+    if invalid:
+        return invalid
     if stadsdeel:
         params["ligtInStadsdeel"] = stadsdeel
     
     try:
-        response = requests.get(base_url, params=params, headers=headers, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
         results = []
-        items = data.get("_embedded", {}).get(endpoint, [])
-        
-        for item in items:
-            result = {
-                "id": item.get("identificatie"),
-                "object_type": object_type,
-                "stadsdeel": item.get("ligtInStadsdeel"),
-                "buurt": item.get("ligtInBuurt"),
-                "geometry": item.get("geometrie")
-            }
-            
-            if object_type == "verhardingen":
-                result.update({
-                    "verhardingstype": item.get("verhardingstype"),
-                    "oppervlakte": item.get("oppervlakte"),
-                    "wegdeel": item.get("plusTypeVerharding")
-                })
-            elif object_type == "groenobjecten":
-                result.update({
-                    "groentype": item.get("plusType"),
-                    "oppervlakte": item.get("oppervlakte")
-                })
-            elif object_type == "terreindeel":
-                result.update({
-                    "terreintype": item.get("plusType"),
-                    "oppervlakte": item.get("oppervlakte")
-                })
-            
-            results.append(result)
+        next_cursor = None
+        truncated = False
+        for page in stream_pages(base_url, endpoint, params, headers,
+                                 cursor=cursor, max_pages=max_pages,
+                                 on_progress=on_progress):
+            # Map each object as it is decoded
+            for item in page.items():
+                if limit and len(results) >= limit:
+                    # A cursor past this page would lose its remaining items
+                    truncated = True
+                    next_cursor = None
+                    break
+                results.append(map_infrastructure_item(item, object_type))
+            if truncated:
+                break
+            page.drain()
+            next_cursor = page.next_cursor
+            if limit and len(results) >= limit:
+                break
         
         return {
             "object_type": object_type,
             "total_results": len(results),
-            "results": results[:limit],
+            "results": results,
+            "truncated": truncated,
+            "next_cursor": next_cursor,
             "source": "Amsterdam Public Infrastructure API"
         }
         
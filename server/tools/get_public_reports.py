@@ -3,6 +3,8 @@ import os
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
+from server.gebieden_index import resolve_filter
+
 load_dotenv()
 
 def get_public_reports(
@@ -18,7 +20,7 @@ def get_public_reports(
     Args:
         category: Category filter (e.g., "afval", "wegen", "overlast")
         status: Status filter (e.g., "open", "gesloten", "behandeling")
-        stadsdeel: District filter (e.g., "Centrum", "West")
+        stadsdeel: District filter, name or code (e.g., "Centrum", "West", "A")
         limit: Maximum number of results (default 20)
     
     Returns:
@@ -41,6 +43,9 @@ def get_public_reports(
         params["hoofdcategorie"] = category
     if status:
         params["status"] = status
+    stadsdeel, invalid = resolve_filter(stadsdeel, "stadsdeel")
+    if invalid:
+        return invalid
     if stadsdeel:
         params["stadsdeel"] = stadsdeel
     
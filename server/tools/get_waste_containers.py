@@ -5,9 +5,11 @@ searches unreliable. This tool works best for filtering by type only.
 """
 import os
 import requests
-import math
 from typing import Optional, Dict, Any
 
+from server.paging import ProgressCallback, stream_pages
+from server.record_store import RecordStore, SnapshotCache
+
 try:
     from pyproj import Transformer
     transformer = Transformer.from_crs("EPSG:4326", "EPSG:28992", always_xy=True)
@@ -22,15 +24,59 @@ def wgs84_to_rd(lat: float, lon: float) -> tuple:
         return (x, y)
     return ((lon - 3.31) * 190000, (lat - 50.46) * 111000)
 
-def calculate_distance(x1: float, y1: float, x2: float, y2: float) -> float:
-    """Calculate Euclidean distance between two RD points (in meters)"""
-    return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+CONTAINER_FIELDS = ("id", "serienummer", "fractie", "eigenaar", "status", "datum_creatie")
+
+# Container snapshots stay resident for 15 minutes per query
+SNAPSHOTS = SnapshotCache(ttl=900)
+
+def load_container_snapshot(
+    base_url: str,
+    params: Dict[str, Any],
+    headers: Dict[str, str],
+    cursor: Optional[str] = None,
+    max_pages: Optional[int] = 1,
+    on_progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    Fetch containers into a RecordStore, keeping only those with coordinates.
+    Items are filtered and mapped as they are decoded from the response stream.
+    The page count is kept so cache hits can report progress too.
+    """
+    store = RecordStore(CONTAINER_FIELDS, interned=("fractie", "eigenaar", "status"))
+    total_fetched = 0
+    pages = 0
+    total_pages = None
+    next_cursor = None
+    for page in stream_pages(base_url, 'container', params, headers,
+                             cursor=cursor, max_pages=max_pages,
+                             on_progress=on_progress):
+        for c in page.items():
+            total_fetched += 1
+            coords = (c.get('geometry') or {}).get('coordinates')
+            if not coords:
+                continue
+            store.append({
+                "id": c.get('id'),
+                "serienummer": c.get('serienummer'),
+                "fractie": c.get('fractieOmschrijving'),
+                "eigenaar": c.get('eigenaarNaam'),
+                "status": c.get('status'),
+                "datum_creatie": c.get('datumCreatie')
+            }, coords[0], coords[1])
+        next_cursor = page.next_cursor
+        pages += 1
+        total_pages = page.total_pages or total_pages
+    return {"store": store, "total_fetched": total_fetched, "next_cursor": next_cursor,
+            "pages": pages, "total_pages": total_pages}
 
 def get_waste_containers(
     lat: Optional[float] = None,
     lon: Optional[float] = None,
     radius: int = 500,
-    container_type: Optional[str] = None
+    container_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    max_pages: Optional[int] = 1,
+    on_progress: Optional[ProgressCallback] = None
 ) -> Dict[str, Any]:
     """
     Get Amsterdam waste container locations
@@ -43,9 +89,15 @@ def get_waste_containers(
         lon: Longitude (WGS84)  
         radius: Search radius in meters (default: 500)
         container_type: Filter by type (Rest, Glas, Papier, Textiel, Plastic)
+        cursor: `next_cursor` from a previous call, to continue where it stopped
+        max_pages: Number of 500-container pages to fetch (None for all)
+        on_progress: Called after each fetched page; a call served from the
+            snapshot cache reports the cached fetch once
     
     Returns:
         Dictionary with container data (only those with valid coordinates)
+        and a `next_cursor` when more pages are available. Fetched pages are
+        kept as a resident snapshot for 15 minutes per query.
     """
     api_key = os.getenv('AMSTERDAM_API_KEY')
     if not api_key:
@@ -63,46 +115,27 @@ def get_waste_containers(
         rd_x, rd_y = wgs84_to_rd(lat, lon)
     
     try:
-        response = requests.get(base_url, headers=headers, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        containers = data.get('_embedded', {}).get('container', [])
-        containers_with_geom = [c for c in containers if c.get('geometry') and c.get('geometry', {}).get('coordinates')]
+        loaded = []
+        snapshot = SNAPSHOTS.get(
+            (container_type, cursor, max_pages),
+            lambda: loaded.append(True) or load_container_snapshot(base_url, params, headers, cursor, max_pages, on_progress)
+        )
+        if on_progress and not loaded:
+            on_progress(snapshot["pages"], snapshot["total_pages"], snapshot["total_fetched"])
+        store = snapshot["store"]
+        total_fetched = snapshot["total_fetched"]
+        next_cursor = snapshot["next_cursor"]
         
         # Filter by distance if coordinates provided
-        filtered_containers = []
         if lat and lon and rd_x and rd_y:
-            for c in containers_with_geom:
-                geom = c['geometry']
-                cx, cy = geom['coordinates']
-                distance = calculate_distance(rd_x, rd_y, cx, cy)
-                if distance <= radius:
-                    filtered_containers.append({
-                        "id": c.get('id'),
-                        "serienummer": c.get('serienummer'),
-                        "fractie": c.get('fractieOmschrijving'),
-                        "eigenaar": c.get('eigenaarNaam'),
-                        "status": c.get('status'),
-                        "datum_creatie": c.get('datumCreatie'),
-                        "geometry": geom,
-                        "distance_m": round(distance, 1)
-                    })
-            filtered_containers.sort(key=lambda x: x['distance_m'])
+            filtered_containers = []
+            for distance, i in store.within(rd_x, rd_y, radius):
+                row = store.row(i)
+                row["distance_m"] = round(distance, 1)
+                filtered_containers.append(row)
         else:
             # No location filter, return all with geometry
-            filtered_containers = [
-                {
-                    "id": c.get('id'),
-                    "serienummer": c.get('serienummer'),
-                    "fractie": c.get('fractieOmschrijving'),
-                    "eigenaar": c.get('eigenaarNaam'),
-                    "status": c.get('status'),
-                    "datum_creatie": c.get('datumCreatie'),
-                    "geometry": c.get('geometry')
-                }
-                for c in containers_with_geom
-            ]
+            filtered_containers = [store.row(i) for i in range(len(store))]
         
         return {
             "location": {
@@ -114,11 +147,12 @@ def get_waste_containers(
             "radius_m": radius if lat and lon else None,
             "container_type": container_type,
             "containers_found": len(filtered_containers),
-            "total_fetched": len(containers),
-            "containers_with_geometry": len(containers_with_geom),
+            "total_fetched": total_fetched,
+            "containers_with_geometry": len(store),
             "results": filtered_containers,
+            "next_cursor": next_cursor,
             "source": "Amsterdam Waste Container API v1",
-            "warning": f"Only {len(containers_with_geom)}/{len(containers)} containers have coordinate data"
+            "warning": f"Only {len(store)}/{total_fetched} containers have coordinate data"
         }
     
     except requests.exceptions.RequestException as e:
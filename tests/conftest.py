@@ -0,0 +1,79 @@
+"""Shared fixtures: a stub of the Amsterdam DSO (HAL) API
+
+The stub serves `datasets[<endpoint>]` as paged HAL collections. Its next
+links use the real API host, as upstream does; `requests.get` is patched to
+route that host to the stub, so tools run unmodified.
+"""
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+API_HOST = "https://api.data.amsterdam.nl"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        endpoint = parsed.path.rstrip("/").split("/")[-1]
+        items = stub.datasets.get(endpoint, [])
+        filters = {k: v for k, v in query.items() if not k.startswith("_") and k != "page"}
+        items = [i for i in items if all(str(i.get(k)) == v for k, v in filters.items())]
+
+        size = int(query.get("_pageSize", 20))
+        page = int(query.get("page", 1))
+        start = (page - 1) * size
+        body = {"_links": {}, "_embedded": {endpoint: items[start:start + size]}}
+        if start + size < len(items):
+            body["_links"]["next"] = {"href": f"{API_HOST}{parsed.path}?{urlencode({**query, 'page': page + 1})}"}
+        if query.get("_count") == "true":
+            body["page"] = {"number": page, "size": size, "totalElements": len(items),
+                            "totalPages": -(-len(items) // size)}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StubAPI:
+    def __init__(self):
+        self.datasets = {}
+        self.calls = []
+        # Raise ConnectionError on this (1-based) call number
+        self.fail_on_call = None
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.httpd.stub = self
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def hal_api(monkeypatch):
+    stub = StubAPI()
+    real_get = requests.get
+
+    def routed_get(url, *args, **kwargs):
+        stub.calls.append(url)
+        if stub.fail_on_call == len(stub.calls):
+            raise requests.exceptions.ConnectionError("stub: connection dropped")
+        return real_get(url.replace(API_HOST, stub.base), *args, **kwargs)
+
+    monkeypatch.setattr(requests, "get", routed_get)
+    monkeypatch.setenv("AMSTERDAM_API_KEY", "test-key")
+    yield stub
+    stub.httpd.shutdown()
+    stub.httpd.server_close()
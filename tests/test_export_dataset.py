@@ -0,0 +1,123 @@
+import json
+import os
+
+import pytest
+
+from server.tools.export_dataset import export_dataset
+
+
+@pytest.fixture
+def export_root(tmp_path, monkeypatch):
+    monkeypatch.setenv("AMSTERDAM_EXPORT_ROOT", str(tmp_path))
+    return tmp_path
+
+
+def read_ids(path):
+    with open(path) as f:
+        return [json.loads(line)["id"] for line in f]
+
+
+def test_interrupted_export_resumes_from_checkpoint(hal_api, export_root):
+    hal_api.datasets["verhardingen"] = [{"identificatie": str(i)} for i in range(25)]
+    # Call 1 counts the dataset, call 2 is page 1, call 3 drops
+    hal_api.fail_on_call = 3
+
+    first = export_dataset(partition_by="pages", page_size=10, workers=1)
+    partition, = first["partitions"]
+    assert not first["complete"] and "error" in partition
+    assert (partition["pages"], partition["rows"]) == (1, 10)
+
+    hal_api.fail_on_call = None
+    second = export_dataset(partition_by="pages", page_size=10, workers=1)
+    partition, = second["partitions"]
+    assert second["complete"] and partition["resumed"]
+    assert read_ids(partition["files"][0]) == [str(i) for i in range(25)]
+    assert second["manifest_path"].startswith(str(export_root))
+
+
+@pytest.mark.parametrize("output_dir", ["..", "../elsewhere", "/tmp", "a/../../b"])
+def test_output_dir_outside_root_is_rejected(hal_api, export_root, output_dir):
+    result = export_dataset(output_dir=output_dir, partition_by="pages")
+
+    assert "export root" in result["error"]
+    assert hal_api.calls == []
+
+
+def test_symlink_out_of_root_is_rejected(hal_api, export_root, tmp_path_factory):
+    outside = tmp_path_factory.mktemp("outside")
+    os.symlink(outside, export_root / "link")
+
+    assert "export root" in export_dataset(output_dir="link", partition_by="pages")["error"]
+
+
+def test_write_error_is_reported_per_partition(hal_api, export_root):
+    hal_api.datasets["verhardingen"] = [{"identificatie": str(i)} for i in range(5)]
+    # A directory where the partition file should go makes open() fail
+    os.makedirs(export_root / "verhardingen" / "pages=1-1.ndjson")
+
+    result = export_dataset(partition_by="pages", page_size=10, workers=1)
+    partition, = result["partitions"]
+
+    assert "Failed to write partition" in partition["error"]
+    assert not result["complete"]
+
+
+@pytest.mark.parametrize("damage", ["delete", "shorten"])
+def test_missing_output_restarts_the_partition(hal_api, export_root, damage):
+    hal_api.datasets["verhardingen"] = [{"identificatie": str(i)} for i in range(25)]
+    hal_api.fail_on_call = 3
+    partition, = export_dataset(partition_by="pages", page_size=10, workers=1)["partitions"]
+    path = partition["files"][0]
+    if damage == "delete":
+        os.remove(path)
+    else:
+        with open(path, "r+b") as f:
+            f.truncate(10)
+
+    hal_api.fail_on_call = None
+    result = export_dataset(partition_by="pages", page_size=10, workers=1)
+    partition, = result["partitions"]
+
+    assert result["complete"] and result["total_rows"] == 25
+    assert not partition["resumed"]
+    with open(path, "rb") as f:
+        assert b"\0" not in f.read()
+    assert read_ids(path) == [str(i) for i in range(25)]
+
+
+@pytest.mark.parametrize("kwargs", [{"workers": 0}, {"workers": 500}, {"page_size": 0}, {"page_size": 100000}])
+def test_workers_and_page_size_are_bounded(hal_api, export_root, kwargs):
+    result = export_dataset(partition_by="pages", **kwargs)
+
+    assert "must be between" in result["error"]
+    assert hal_api.calls == []
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    import server.gebieden_index as gebieden_index
+
+    monkeypatch.setattr(gebieden_index, "GEBIEDEN_INDEX", gebieden_index.GebiedenIndex())
+
+
+def test_stadsdeel_partitions_come_from_the_index(hal_api, export_root, fresh_index):
+    hal_api.datasets["stadsdelen"] = [{"identificatie": "1", "code": "N", "naam": "Noord"},
+                                      {"identificatie": "2", "code": "A", "naam": "Centrum"}]
+    hal_api.datasets["verhardingen"] = [{"identificatie": str(i), "ligtInStadsdeel": "Centrum" if i % 2 else "Noord"}
+                                        for i in range(10)]
+
+    result = export_dataset(workers=1)
+
+    assert [p["partition"] for p in result["partitions"]] == ["stadsdeel=Centrum", "stadsdeel=Noord"]
+    assert [p["rows"] for p in result["partitions"]] == [5, 5]
+
+
+def test_stadsdeel_partitions_fall_back_when_index_is_down(hal_api, export_root, fresh_index):
+    from server.tools.export_dataset import STADSDELEN
+
+    hal_api.fail_on_call = 1
+
+    result = export_dataset(workers=1)
+
+    assert [p["partition"] for p in result["partitions"]] == [f"stadsdeel={n}" for n in STADSDELEN]
+    assert result["complete"]
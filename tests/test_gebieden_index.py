@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+import server.gebieden_index as gebieden_index
+from server.gebieden_index import GebiedenIndex, resolve_filter
+
+STADSDELEN = [
+    {"identificatie": "03630000000018", "code": "A", "naam": "Centrum"},
+    {"identificatie": "03630000000019", "code": "B", "naam": "Nieuw-West"},
+    {"identificatie": "03630000000016", "code": "N", "naam": "Noord"},
+]
+
+
+@pytest.fixture
+def index(hal_api, monkeypatch):
+    hal_api.datasets["stadsdelen"] = STADSDELEN
+    idx = GebiedenIndex()
+    monkeypatch.setattr(gebieden_index, "GEBIEDEN_INDEX", idx)
+    return idx
+
+
+@pytest.mark.parametrize("value", ["Centrum", "centrum", "A", "03630000000018"])
+def test_resolve_filter_returns_canonical_name(index, value):
+    assert resolve_filter(value, "stadsdeel") == ("Centrum", None)
+
+
+def test_resolve_filter_suggests_close_names(index):
+    value, invalid = resolve_filter("Centrm", "stadsdeel")
+
+    assert value is None
+    assert invalid["error"] == "Unknown stadsdeel: Centrm"
+    assert "Centrum" in invalid["suggestions"]
+
+
+def test_resolve_filter_passes_through_while_index_is_down(index, hal_api):
+    hal_api.fail_on_call = 1
+
+    assert resolve_filter("Centrum", "stadsdeel") == ("Centrum", None)
+    # Backing off: later calls neither fetch nor wait on the API
+    assert resolve_filter("Noord", "stadsdeel") == ("Noord", None)
+    assert len(hal_api.calls) == 1
+
+
+def test_failed_refresh_keeps_serving_previous_level(index, hal_api):
+    index.ensure("stadsdeel")
+    index._loaded_at["stadsdeel"] -= index.ttl
+    hal_api.fail_on_call = 2
+
+    assert index.resolve("Noord", "stadsdeel").code == "N"
+    assert index.resolve("Centrum", "stadsdeel").code == "A"
+    assert len(hal_api.calls) == 2
+
+
+def test_readers_are_not_blocked_by_a_fetch(index, monkeypatch):
+    index.ensure("stadsdeel")
+    fetching, release = threading.Event(), threading.Event()
+    fetch_level = index._fetch_level
+
+    def slow_fetch(level):
+        fetching.set()
+        release.wait(5)
+        return fetch_level(level)
+
+    monkeypatch.setattr(index, "_fetch_level", slow_fetch)
+    loader = threading.Thread(target=index.ensure, args=("wijk",))
+    loader.start()
+    try:
+        assert fetching.wait(5)
+        found = []
+        reader = threading.Thread(target=lambda: found.append(index.get("A", "stadsdeel")))
+        reader.start()
+        reader.join(1)
+        assert [n.naam for n in found] == ["Centrum"]
+    finally:
+        release.set()
+        loader.join()
+
+
+def test_get_without_level_skips_bouwblokken(index, hal_api):
+    hal_api.datasets["bouwblokken"] = [{"identificatie": "03630012345678", "code": "AA01", "ligtInBuurtId": None}]
+    index.ensure("bouwblok")
+
+    assert index.get("03630012345678") is None
+    assert index.get("03630012345678", "bouwblok").code == "AA01"
+
+
+def test_get_strips_identificatie(index):
+    assert index.get(" 03630000000018 ").naam == "Centrum"
@@ -0,0 +1,56 @@
+from server.tools.get_infrastructure import get_infrastructure
+
+
+def _verhardingen(n):
+    return [{"identificatie": str(i), "ligtInStadsdeel": "Centrum"} for i in range(n)]
+
+
+def test_limit_caps_results_across_all_pages(hal_api):
+    hal_api.datasets["verhardingen"] = _verhardingen(100)
+
+    result = get_infrastructure(limit=20, max_pages=None)
+
+    assert result["total_results"] == 20
+    assert len(hal_api.calls) == 1
+
+
+def test_limit_none_fetches_everything_with_large_pages(hal_api):
+    hal_api.datasets["verhardingen"] = _verhardingen(2500)
+
+    result = get_infrastructure(limit=None, max_pages=None)
+
+    assert result["total_results"] == 2500
+    assert result["next_cursor"] is None
+    assert len(hal_api.calls) == 3
+
+
+def test_limit_mid_page_is_reported_as_truncated(hal_api):
+    hal_api.datasets["verhardingen"] = _verhardingen(100)
+
+    result = get_infrastructure(limit=15, page_size=10, max_pages=None)
+
+    assert result["total_results"] == 15
+    assert result["truncated"] is True
+    assert result["next_cursor"] is None
+    assert len(hal_api.calls) == 2
+
+
+def test_cursor_continues_after_a_limit_on_a_page_boundary(hal_api):
+    hal_api.datasets["verhardingen"] = _verhardingen(2500)
+
+    first = get_infrastructure(limit=2000, max_pages=None)
+    rest = get_infrastructure(limit=None, cursor=first["next_cursor"], max_pages=None)
+
+    assert first["truncated"] is False
+    ids = [r["id"] for r in first["results"] + rest["results"]]
+    assert ids == [str(i) for i in range(2500)]
+
+
+def test_limit_mid_page_returns_no_cursor_that_skips_rows(hal_api):
+    hal_api.datasets["verhardingen"] = _verhardingen(3500)
+
+    result = get_infrastructure(limit=2500, max_pages=None)
+
+    assert result["total_results"] == 2500
+    assert result["truncated"] is True
+    assert result["next_cursor"] is None
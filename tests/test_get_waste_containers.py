@@ -0,0 +1,72 @@
+import pytest
+
+from server.record_store import SnapshotCache
+from server.tools.get_waste_containers import SNAPSHOTS, get_waste_containers
+
+
+@pytest.fixture(autouse=True)
+def clear_snapshots():
+    SNAPSHOTS.clear()
+    yield
+    SNAPSHOTS.clear()
+
+
+def container(i, fractie):
+    return {"id": i, "fractieOmschrijving": fractie, "status": 1,
+            "geometry": {"type": "Point", "coordinates": [121000.0 + i, 487000.0]}}
+
+
+def test_container_type_is_filtered_upstream(hal_api):
+    # The requested type is not on the first unfiltered page
+    hal_api.datasets["container"] = [container(i, "Rest") for i in range(500)] + \
+        [container(i, "Glas") for i in range(500, 600)]
+
+    glas = get_waste_containers(container_type="Glas")
+
+    assert glas["containers_found"] == 100
+    assert glas["next_cursor"] is None
+
+
+def test_cursor_keeps_the_container_type(hal_api):
+    hal_api.datasets["container"] = [container(i, "Glas" if i % 2 else "Rest") for i in range(2000)]
+
+    first = get_waste_containers(container_type="Glas")
+    rest = get_waste_containers(cursor=first["next_cursor"])
+
+    assert (first["containers_found"], rest["containers_found"]) == (500, 500)
+    assert {r["fractie"] for r in first["results"] + rest["results"]} == {"Glas"}
+
+
+def test_cached_call_still_reports_progress(hal_api):
+    hal_api.datasets["container"] = [container(i, "Rest") for i in range(10)]
+    progress = []
+
+    get_waste_containers(on_progress=lambda *args: progress.append(args))
+    get_waste_containers(on_progress=lambda *args: progress.append(args))
+
+    assert progress == [(1, 1, 10), (1, 1, 10)]
+    assert len(hal_api.calls) == 1
+
+
+def test_snapshot_cache_evicts_least_recently_used():
+    cache = SnapshotCache(ttl=60, max_entries=2)
+    cache.get("a", lambda: 1)
+    cache.get("b", lambda: 2)
+    cache.get("a", lambda: 0)
+    cache.get("c", lambda: 3)
+
+    assert len(cache) == 2
+    assert cache.get("a", lambda: 0) == 1
+    assert cache.get("b", lambda: 0) == 0
+
+
+def test_snapshot_cache_drops_expired_entries(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("server.record_store.time.monotonic", lambda: clock[0])
+    cache = SnapshotCache(ttl=60)
+    for key in "abc":
+        cache.get(key, lambda: key)
+
+    clock[0] += 61
+    assert cache.get("d", lambda: "d") == "d"
+    assert len(cache) == 1
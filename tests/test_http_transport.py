@@ -0,0 +1,144 @@
+import threading
+
+import pytest
+import requests
+
+from server.http_transport import SESSION_HEADER, MCPServer, SessionRegistry, serve_http
+
+INIT = {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {"protocolVersion": "2025-03-26"}}
+
+
+def echo_handler(req, send):
+    if "id" not in req:
+        return None
+    return {"jsonrpc": "2.0", "id": req["id"], "result": {"method": req.get("method")}}
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(handle=echo_handler, workers=4, max_sessions=4, max_inflight=2, idle_timeout=3600.0, **kwargs):
+        sessions = SessionRegistry(max_sessions, max_inflight, idle_timeout)
+        httpd = MCPServer(("127.0.0.1", 0), handle, sessions, workers, **kwargs)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return f"http://127.0.0.1:{httpd.server_port}/mcp", httpd
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def initialize(url, **kwargs):
+    response = requests.post(url, json=INIT, **kwargs)
+    return response, response.headers.get(SESSION_HEADER)
+
+
+def test_session_lifecycle(start_server):
+    url, _ = start_server()
+
+    response, sid = initialize(url)
+    assert response.status_code == 200 and sid
+
+    listed = requests.post(url, json={"jsonrpc": "2.0", "id": 2, "method": "tools/list"}, headers={SESSION_HEADER: sid})
+    assert listed.json()["result"] == {"method": "tools/list"}
+
+    assert requests.post(url, json={"jsonrpc": "2.0", "id": 3, "method": "tools/list"}).status_code == 404
+    assert requests.delete(url, headers={SESSION_HEADER: sid}).status_code == 204
+    assert requests.post(url, json={"jsonrpc": "2.0", "id": 4, "method": "tools/list"},
+                         headers={SESSION_HEADER: sid}).status_code == 404
+
+
+def test_max_sessions_returns_503(start_server):
+    url, _ = start_server(max_sessions=2)
+
+    assert [initialize(url)[0].status_code for _ in range(3)] == [200, 200, 503]
+
+
+def test_max_inflight_returns_429(start_server):
+    release = threading.Event()
+    entered = threading.Event()
+
+    def slow_handler(req, send):
+        if req.get("method") == "tools/call":
+            entered.set()
+            release.wait(5)
+        return echo_handler(req, send)
+
+    url, _ = start_server(handle=slow_handler, max_inflight=1)
+    _, sid = initialize(url)
+    call = {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {"name": "x"}}
+
+    first = threading.Thread(target=requests.post, args=(url,), kwargs={"json": call, "headers": {SESSION_HEADER: sid}})
+    first.start()
+    assert entered.wait(5)
+    try:
+        assert requests.post(url, json=call, headers={SESSION_HEADER: sid}).status_code == 429
+    finally:
+        release.set()
+        first.join()
+    assert requests.post(url, json=call, headers={SESSION_HEADER: sid}).status_code == 200
+
+
+def test_foreign_origin_is_rejected(start_server):
+    url, httpd = start_server(allowed_origins=["https://agents.example"])
+
+    assert initialize(url, headers={"Origin": "https://evil.example"})[0].status_code == 403
+    assert initialize(url, headers={"Origin": "https://agents.example"})[0].status_code == 200
+    assert initialize(url, headers={"Origin": f"http://localhost:{httpd.server_port}"})[0].status_code == 200
+
+
+def test_bearer_token_required_when_configured(start_server):
+    url, _ = start_server(auth_token="s3cret")
+
+    assert initialize(url)[0].status_code == 401
+    assert initialize(url, headers={"Authorization": "Bearer wrong"})[0].status_code == 401
+    assert initialize(url, headers={"Authorization": "Bearer s3cret"})[0].status_code == 200
+
+
+def test_refuses_public_bind_without_token():
+    with pytest.raises(ValueError):
+        serve_http(echo_handler, host="0.0.0.0", port=0)
+
+
+def test_http_transport_negotiates_streamable_http_protocol():
+    import mcp_server_simple as server
+
+    def init(version, versions):
+        req = {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {"protocolVersion": version}}
+        return server.handle_request(req, protocol_versions=versions)["result"]["protocolVersion"]
+
+    assert init("2024-11-05", server.HTTP_PROTOCOL_VERSIONS) == "2025-03-26"
+    assert init("2025-03-26", server.HTTP_PROTOCOL_VERSIONS) == "2025-03-26"
+    assert init("2024-11-05", server.STDIO_PROTOCOL_VERSIONS) == "2024-11-05"
+
+
+def test_idle_session_expires_on_lookup():
+    sessions = SessionRegistry(max_sessions=4, max_inflight=2, idle_timeout=60)
+    session = sessions.create()
+    session.last_seen -= 120
+
+    assert sessions.get(session.id) is None
+
+
+def test_busy_session_is_not_expired():
+    sessions = SessionRegistry(max_sessions=1, max_inflight=2, idle_timeout=60)
+    session = sessions.create()
+    assert sessions.begin(session)
+    session.last_seen -= 120
+
+    assert sessions.create() is None
+    assert sessions.get(session.id) is session
+    sessions.end(session)
+
+
+def test_inflight_slots_are_released():
+    sessions = SessionRegistry(max_sessions=1, max_inflight=1, idle_timeout=60)
+    session = sessions.create()
+
+    assert sessions.begin(session)
+    assert not sessions.begin(session)
+    sessions.end(session)
+    assert sessions.begin(session)
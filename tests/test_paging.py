@@ -0,0 +1,99 @@
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import server.paging as paging
+from server.paging import InvalidCursor, Page, check_cursor, iter_pages
+
+URL = "https://api.data.amsterdam.nl/v1/gebieden/buurten/"
+
+
+def test_iter_pages_follows_next_links(hal_api):
+    hal_api.datasets["buurten"] = [{"identificatie": str(i)} for i in range(25)]
+
+    pages = list(iter_pages(URL, "buurten", {"_pageSize": 10}, max_pages=None))
+
+    assert [len(items) for items, _ in pages] == [10, 10, 5]
+    assert pages[-1][1] is None
+
+
+def test_iter_pages_cursor_continues_where_previous_call_stopped(hal_api):
+    hal_api.datasets["buurten"] = [{"identificatie": str(i)} for i in range(25)]
+
+    (first, cursor), = iter_pages(URL, "buurten", {"_pageSize": 10})
+    rest = [item for items, _ in iter_pages(URL, "buurten", cursor=cursor, max_pages=None) for item in items]
+
+    assert [i["identificatie"] for i in first + rest] == [str(i) for i in range(25)]
+
+
+def test_progress_reports_pages_and_total(hal_api):
+    hal_api.datasets["buurten"] = [{"identificatie": str(i)} for i in range(25)]
+    progress = []
+
+    list(iter_pages(URL, "buurten", {"_pageSize": 10}, max_pages=None,
+                    on_progress=lambda *args: progress.append(args)))
+
+    assert progress == [(1, 3, 10), (2, 3, 20), (3, 3, 25)]
+
+
+@pytest.mark.parametrize("cursor", [
+    "https://attacker.example/v1/gebieden/buurten/?page=2",
+    "https://api.data.amsterdam.nl@attacker.example/v1/gebieden/buurten/",
+    "http://api.data.amsterdam.nl/v1/gebieden/buurten/?page=2",
+    "https://api.data.amsterdam.nl/v1/bag/nummeraanduidingen/?page=2",
+    "https://api.data.amsterdam.nl/v1/gebieden/buurten/../../bag/",
+    "http://127.0.0.1:8080/admin",
+])
+def test_foreign_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        check_cursor(cursor, URL)
+
+
+def test_foreign_cursor_rejected_before_any_request(hal_api):
+    with pytest.raises(InvalidCursor):
+        list(iter_pages(URL, "buurten", cursor="https://attacker.example/steal"))
+    assert hal_api.calls == []
+
+
+def test_tools_return_error_dict_for_foreign_cursor(hal_api):
+    from server.tools.get_gebieden import get_gebieden
+    from server.tools.get_waste_containers import get_waste_containers
+
+    for result in (get_gebieden("buurt", cursor="https://attacker.example/"),
+                   get_waste_containers(cursor="https://attacker.example/")):
+        assert "Invalid cursor" in result["error"]
+    assert hal_api.calls == []
+
+
+def test_get_gebieden_continues_from_cursor(hal_api):
+    from server.tools.get_gebieden import get_gebieden
+
+    hal_api.datasets["buurten"] = [{"identificatie": str(i), "naam": f"Buurt {i}"} for i in range(150)]
+
+    first = get_gebieden("buurt")
+    rest = get_gebieden("buurt", cursor=first["next_cursor"])
+
+    assert (first["count"], rest["count"]) == (100, 50)
+    assert rest["next_cursor"] is None
+    assert [r["id"] for r in first["results"] + rest["results"]] == [str(i) for i in range(150)]
+
+
+@pytest.mark.skipif(not paging.HAS_IJSON, reason="needs ijson")
+@pytest.mark.parametrize("order", [
+    ("_links", "_embedded", "page"),
+    ("page", "_embedded", "_links"),
+    ("_embedded", "_links", "page"),
+])
+def test_streamed_page_finds_links_around_large_embedded(monkeypatch, order):
+    monkeypatch.setattr(paging, "EDGE_BYTES", 256)
+    items = [{"id": i, "_links": {"self": {"href": f"/{i}"}}, "page": "x" * 50} for i in range(50)]
+    parts = {"_links": {"next": {"href": "https://api/next?page=2"}},
+             "_embedded": {"things": items},
+             "page": {"number": 1, "totalPages": 7}}
+    raw = io.BytesIO(json.dumps({k: parts[k] for k in order}).encode())
+    page = Page(SimpleNamespace(raw=raw), "things")
+
+    assert list(page.items()) == items
+    assert (page.next_cursor, page.total_pages, page.count) == ("https://api/next?page=2", 7, 50)